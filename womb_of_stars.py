@@ -2,6 +2,7 @@ import random
 import time
 from enum import Enum
 from typing import List, Dict, Optional, Tuple
+from womb_of_stars_memory import MemoryEntry, MemoryStore, SignalMemory
 
 # 路径枚举类：定义电信号的不同发展路径
 class Path(Enum):
@@ -28,15 +29,85 @@ class ExperimentStage(Enum):
     REGENESIS = "再创世"
     ETERNAL_RECURRENCE = "永劫轮回"
 
+# 决策模板：各原动力对应的决策描述，{}处填入电信号ID
+DECISION_TEMPLATES = {
+    Motivation.HATRED: "{} 因憎恨做出破坏性行动",  # 憎恨：破坏性决策
+    Motivation.DESIRE: "{} 因渴望做出利己行动",  # 渴望：利己决策
+    Motivation.PEACE: "{} 因平和做出最小扰动行动",  # 平和：最小扰动决策
+    Motivation.CRITICISM: "{} 因批判做出求解行动",  # 批判：求解决策
+}
+DEFAULT_DECISION_TEMPLATE = "{} 做出普通行动"  # 其他原动力的决策描述
+
+# 初始电信号：基于参考文档中的电信号创建的示例，(电信号ID, 路径, 原动力)
+INITIAL_SIGNALS: List[Tuple[str, Path, Motivation]] = [
+    ("NeiKos496", Path.NEGATIVE_WORLD, Motivation.HATRED),
+    ("PhiLia093", Path.TIME, Motivation.HATRED),  # 原动力被屏蔽，这里暂时使用HATRED
+    ("OreXis945", Path.TRICKERY, Motivation.DESIRE),
+    ("EpieiKeia216", Path.DEATH, Motivation.PEACE),
+    ("SkeMma720", Path.REASON, Motivation.CRITICISM),
+]
+
+# 按循环次数推进的阶段：当前阶段 -> (转换所需的循环次数, 下一阶段)
+STAGE_THRESHOLDS = {
+    ExperimentStage.INORGANIC: (500, ExperimentStage.ORGANIC),
+    ExperimentStage.ORGANIC: (1500, ExperimentStage.HUMAN),
+    ExperimentStage.HUMAN: (3000, ExperimentStage.REGENESIS),
+}
+# 进入各阶段时的提示
+STAGE_MESSAGES = {
+    ExperimentStage.ORGANIC: "转换至有机生命阶段",
+    ExperimentStage.HUMAN: "转换至人类阶段",
+    ExperimentStage.REGENESIS: "转换至再创世阶段",
+    ExperimentStage.ETERNAL_RECURRENCE: "进入永劫轮回阶段",
+}
+REGENESIS_LOCKED_SIGNALS = 3  # 进入再创世阶段时锁定的电信号数量
+ETERNAL_RECURRENCE_PROBABILITY = 0.1  # 再创世阶段每个循环进入永劫轮回的概率
+BREAKTHROUGH_PROBABILITY = 0.05  # 开拓者介入后每个永劫轮回循环突破的概率
+MAX_CYCLES = 10000  # 实验的最大循环次数
+
+
+def next_stage(stage: ExperimentStage, cycles: int, rng=random) -> Optional[ExperimentStage]:
+    """确定本循环要转换到的实验阶段
+
+    Args:
+        stage: 当前实验阶段
+        cycles: 当前循环次数
+        rng: 随机数生成器（random模块或random.Random实例）
+
+    Returns:
+        Optional[ExperimentStage]: 要转换到的阶段，不转换时返回None
+    """
+    if stage in STAGE_THRESHOLDS:
+        threshold, following = STAGE_THRESHOLDS[stage]
+        return following if cycles >= threshold else None
+    if stage == ExperimentStage.REGENESIS and rng.random() < ETERNAL_RECURRENCE_PROBABILITY:
+        # 随机进入永劫轮回
+        return ExperimentStage.ETERNAL_RECURRENCE
+    return None
+
+
+def experiment_finished(stage: ExperimentStage, cycles: int, eternal_recurrence_count: int) -> bool:
+    """检查实验是否结束：达到最大循环次数，或经历永劫轮回后回到再创世阶段
+
+    Args:
+        stage: 当前实验阶段
+        cycles: 当前循环次数
+        eternal_recurrence_count: 永劫轮回计数
+
+    Returns:
+        bool: 实验结束时返回True
+    """
+    return cycles >= MAX_CYCLES or (stage == ExperimentStage.REGENESIS and eternal_recurrence_count > 0)
+
 # 电信号类：实验中的基本单位
 class ElectricalSignal:
-    def __init__(self, signal_id: str, path: Path, motivation: Motivation):
+    def __init__(self, signal_id: str, path: Path, motivation: Motivation, memory_store: Optional[MemoryStore] = None):
         self.signal_id = signal_id  # 电信号ID
         self.path = path  # 电信号路径
         self.motivation = motivation  # 电信号原动力
         self.is_locked = False  # 是否被锁定
         self.is_merged = False  # 是否已合并
-        self.memory = []  # 电信号记忆
+        self.memory = SignalMemory(memory_store)  # 电信号记忆（按循环次数索引）
         self.golden_blood = False  # 毁灭特征
         self.black_tide_infected = False  # 黑潮感染
 
@@ -88,24 +159,18 @@ class ElectricalSignal:
         Returns:
             str: 决策描述
         """
-        if self.motivation == Motivation.HATRED:
-            # 憎恨：破坏性决策
-            return f"{self.signal_id} 因憎恨做出破坏性行动"
-        elif self.motivation == Motivation.DESIRE:
-            # 渴望：利己决策
-            return f"{self.signal_id} 因渴望做出利己行动"
-        elif self.motivation == Motivation.PEACE:
-            # 平和：最小扰动决策
-            return f"{self.signal_id} 因平和做出最小扰动行动"
-        elif self.motivation == Motivation.CRITICISM:
-            # 批判：求解决策
-            return f"{self.signal_id} 因批判做出求解行动"
-        else:
-            return f"{self.signal_id} 做出普通行动"
+        return DECISION_TEMPLATES.get(self.motivation, DEFAULT_DECISION_TEMPLATE).format(self.signal_id)
 
 # 翁法罗斯实验类：管理整个实验过程
 class WombOfStars:
-    def __init__(self):
+    def __init__(self, memory_per_signal: int = 1000, memory_global: int = 20000, memory_path: Optional[str] = None):
+        """创建实验
+
+        Args:
+            memory_per_signal: 单个电信号在内存中保留的最大记忆条数
+            memory_global: 所有电信号在内存中保留的最大记忆条数
+            memory_path: 记忆段文件路径，为None时使用临时文件
+        """
         self.stage = ExperimentStage.INORGANIC  # 当前实验阶段
         self.cycles = 0  # 实验循环次数
         self.signals: List[ElectricalSignal] = []  # 电信号列表
@@ -114,6 +179,10 @@ class WombOfStars:
         self.black_tide_infected_count = 0  # 黑潮感染电信号计数
         self.eternal_recurrence_count = 0  # 永劫轮回计数
         self.pioneer_intervened = False  # 开拓者是否介入
+        self.pioneer_cycle: Optional[int] = None  # 开拓者首次介入时的循环次数
+        self.breakthrough_cycle: Optional[int] = None  # 突破永劫轮回时的循环次数
+        self.stage_cycles: Dict[ExperimentStage, int] = {self.stage: 0}  # 首次进入各阶段时的循环次数
+        self.memory_store = MemoryStore(memory_per_signal, memory_global, memory_path)  # 电信号分层记忆存储
 
     def initialize(self) -> None:
         """初始化实验
@@ -131,12 +200,8 @@ class WombOfStars:
         
         基于参考文档中的电信号创建示例电信号，包括不同路径和原动力
         """
-        # 基于参考文档中的电信号创建一些示例
-        self.signals.append(ElectricalSignal("NeiKos496", Path.NEGATIVE_WORLD, Motivation.HATRED))
-        self.signals.append(ElectricalSignal("PhiLia093", Path.TIME, Motivation.HATRED))  # 原动力被屏蔽，这里暂时使用HATRED
-        self.signals.append(ElectricalSignal("OreXis945", Path.TRICKERY, Motivation.DESIRE))
-        self.signals.append(ElectricalSignal("EpieiKeia216", Path.DEATH, Motivation.PEACE))
-        self.signals.append(ElectricalSignal("SkeMma720", Path.REASON, Motivation.CRITICISM))
+        for signal_id, path, motivation in INITIAL_SIGNALS:
+            self.signals.append(ElectricalSignal(signal_id, path, motivation, self.memory_store))
 
     def run_cycle(self) -> bool:
         """运行一个实验循环
@@ -163,13 +228,14 @@ class WombOfStars:
             self.eternal_recurrence_count += 1
             print(f"永劫轮回计数: {self.eternal_recurrence_count}")
             # 检查是否突破永劫轮回
-            if self.pioneer_intervened and random.random() < 0.05:
+            if self.pioneer_intervened and random.random() < BREAKTHROUGH_PROBABILITY:
                 print("外部变量介入，突破永劫轮回!")
                 self.stage = ExperimentStage.REGENESIS
+                self.breakthrough_cycle = self.cycles
                 return True
 
         # 检查实验是否结束
-        if self.cycles >= 10000 or (self.stage == ExperimentStage.REGENESIS and self.eternal_recurrence_count > 0):
+        if experiment_finished(self.stage, self.cycles, self.eternal_recurrence_count):
             print("实验结束")
             return False
 
@@ -180,24 +246,17 @@ class WombOfStars:
         
         根据当前循环次数和阶段，决定是否转换到下一个实验阶段
         """
-        if self.stage == ExperimentStage.INORGANIC and self.cycles >= 500:
-            self.stage = ExperimentStage.ORGANIC
-            print("转换至有机生命阶段")
-        elif self.stage == ExperimentStage.ORGANIC and self.cycles >= 1500:
-            self.stage = ExperimentStage.HUMAN
-            print("转换至人类阶段")
-        elif self.stage == ExperimentStage.HUMAN and self.cycles >= 3000:
-            self.stage = ExperimentStage.REGENESIS
-            print("转换至再创世阶段")
+        stage = next_stage(self.stage, self.cycles)
+        if stage is not None:
+            self.stage = stage
+            print(STAGE_MESSAGES[stage])
+        if stage == ExperimentStage.REGENESIS:
             # 锁定部分电信号
-            for signal in random.sample(self.signals, min(3, len(self.signals))):
+            for signal in random.sample(self.signals, min(REGENESIS_LOCKED_SIGNALS, len(self.signals))):
                 signal.is_locked = True
                 self.locked_signals.append(signal)
                 print(f"电信号 {signal.signal_id} 被锁定")
-        elif self.stage == ExperimentStage.REGENESIS and random.random() < 0.1:
-            # 随机进入永劫轮回
-            self.stage = ExperimentStage.ETERNAL_RECURRENCE
-            print("进入永劫轮回阶段")
+        elif stage == ExperimentStage.ETERNAL_RECURRENCE:
             # NeiKos496通常会在永劫轮回中起关键作用
             neikos = next((s for s in self.signals if s.signal_id == "NeiKos496"), None)
             if neikos:
@@ -205,6 +264,9 @@ class WombOfStars:
                 self.locked_signals.append(neikos)
                 print(f"电信号 {neikos.signal_id} 在永劫轮回中被锁定")
 
+        # 记录首次进入当前阶段的循环次数
+        self.stage_cycles.setdefault(self.stage, self.cycles)
+
     def _signals_action(self) -> None:
         """电信号行动模拟
         
@@ -216,7 +278,7 @@ class WombOfStars:
                 action = signal.make_decision(context)
                 print(action)
                 # 记录记忆
-                signal.memory.append(f"循环 {self.cycles}: {action}")
+                signal.memory.record(self.cycles, action)
 
         # 处理电信号之间的互动
         if len(self.signals) > 1 and random.random() < 0.3:
@@ -258,16 +320,43 @@ class WombOfStars:
         """
         print("\n=== 外部变量 '开拓者' 介入 ===")
         self.pioneer_intervened = True
+        if self.pioneer_cycle is None:
+            self.pioneer_cycle = self.cycles
         # 开拓者可能会接替空缺的路径
         time_path_signal = next((s for s in self.signals if s.path == Path.TIME), None)
         if time_path_signal and time_path_signal.is_merged:
             # 创建新的电信号接替岁月路径
-            new_signal = ElectricalSignal("Pioneer", Path.TIME, Motivation.PEACE)
+            new_signal = ElectricalSignal("Pioneer", Path.TIME, Motivation.PEACE, self.memory_store)
             self.signals.append(new_signal)
             print(f"开拓者接替了岁月路径，创建新电信号 {new_signal.signal_id}")
         else:
             print("开拓者介入，影响实验进程")
 
+    def query_memory(self, signal_id: str, start_cycle: int, end_cycle: int) -> List[MemoryEntry]:
+        """查询某个电信号在指定循环区间内的记忆
+
+        Args:
+            signal_id: 电信号ID
+            start_cycle: 起始循环次数（包含）
+            end_cycle: 结束循环次数（包含）
+
+        Returns:
+            List[MemoryEntry]: 区间内的(循环次数, 决策描述)记忆条目
+        """
+        result = []
+        for signal in self.signals:
+            if signal.signal_id == signal_id:
+                result.extend(signal.memory.query(start_cycle, end_cycle))
+        return result
+
+    def signal_count(self) -> int:
+        """当前电信号数量（包括已合并的电信号）"""
+        return len(self.signals)
+
+    def close(self) -> None:
+        """释放实验占用的资源（记忆段文件）"""
+        self.memory_store.close()
+
     def print_status(self) -> None:
         """打印当前实验状态"""
         print("\n=== 实验状态 ===")
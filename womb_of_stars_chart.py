@@ -0,0 +1,239 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# 聚合桶：[起始循环, 采样数, 最小值, 最大值, 总和]
+Bucket = List[float]
+# 降采样点：(循环次数, 最小值, 最大值, 均值)
+ChartPoint = Tuple[float, float, float, float]
+
+
+def _merge_bucket(target: Bucket, source: Bucket) -> None:
+    """将一个聚合桶合并到另一个聚合桶中"""
+    target[1] += source[1]
+    target[2] = min(target[2], source[2])
+    target[3] = max(target[3], source[3])
+    target[4] += source[4]
+
+
+# 多分辨率时间序列：第k层的每个桶覆盖2^k个循环，每层最多保留capacity个桶
+class MultiResolutionSeries:
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity  # 每层保留的最大桶数
+        self.levels: List[deque] = []  # 各层已完成的聚合桶
+        self.pending: List[Optional[Bucket]] = []  # 各层尚未完成的聚合桶
+        self.children: List[int] = []  # 各层未完成桶中已合并的下层桶数
+        self.last_cycle = 0  # 最近一次采样的循环次数
+        self.lock = threading.Lock()  # 实验线程写入、GUI线程读取
+
+    def add(self, cycle: int, value: float) -> None:
+        """添加一个采样点
+
+        Args:
+            cycle: 循环次数
+            value: 采样值
+        """
+        with self.lock:
+            self.last_cycle = cycle
+            self._push(0, [cycle, 1, value, value, value])
+
+    def clear(self) -> None:
+        """清空所有采样"""
+        with self.lock:
+            self.levels.clear()
+            self.pending.clear()
+            self.children.clear()
+            self.last_cycle = 0
+
+    def _push(self, level: int, bucket: Bucket) -> None:
+        """将一个已完成的桶加入指定层，并向上一层合并"""
+        if level == len(self.levels):
+            self.levels.append(deque(maxlen=self.capacity))
+            self.pending.append(None)
+            self.children.append(0)
+        self.levels[level].append(bucket)
+        if level + 1 == len(self.levels):
+            # 当前层的桶数超过容量时才需要更粗的一层
+            if len(self.levels[level]) < self.capacity:
+                return
+            self.levels.append(deque(maxlen=self.capacity))
+            self.pending.append(None)
+            self.children.append(0)
+            # 新层从当前层已保留的桶开始构建
+            for existing in list(self.levels[level])[:-1]:
+                self._merge_up(level + 1, existing)
+        self._merge_up(level + 1, bucket)
+
+    def _merge_up(self, level: int, bucket: Bucket) -> None:
+        """将下层的一个桶合并到指定层的未完成桶中"""
+        if self.pending[level] is None:
+            self.pending[level] = list(bucket)
+        else:
+            _merge_bucket(self.pending[level], bucket)
+        self.children[level] += 1
+        if self.children[level] == 2:
+            completed = self.pending[level]
+            self.pending[level] = None
+            self.children[level] = 0
+            self._push(level, completed)
+
+    def view(self, start: float, end: float, max_points: int) -> List[ChartPoint]:
+        """获取指定循环区间内降采样后的数据点
+
+        选择能覆盖起始循环的最细一层，再按像素列做最小-最大降采样，
+        因此开销只与capacity和max_points有关，与运行时长无关
+
+        Args:
+            start: 起始循环次数
+            end: 结束循环次数
+            max_points: 最大数据点数（通常为像素宽度）
+
+        Returns:
+            List[ChartPoint]: 每列的(循环次数, 最小值, 最大值, 均值)
+        """
+        with self.lock:
+            if not self.levels or max_points <= 0:
+                return []
+            level = len(self.levels) - 1
+            for index, buckets in enumerate(self.levels):
+                earliest = buckets[0][0] if buckets else None
+                if earliest is not None and earliest <= start:
+                    level = index
+                    break
+            buckets = list(self.levels[level])
+            # 较细各层中尚未完成的桶包含最新的采样，按时间顺序接在后面
+            for index in range(level, 0, -1):
+                if index < len(self.pending) and self.pending[index] is not None:
+                    buckets.append(list(self.pending[index]))
+
+        span = max(end - start, 1)
+        columns: List[Optional[Bucket]] = [None] * max_points
+        for bucket in buckets:
+            if bucket[0] < start or bucket[0] > end:
+                continue
+            column = min(int((bucket[0] - start) / span * max_points), max_points - 1)
+            if columns[column] is None:
+                columns[column] = list(bucket)
+            else:
+                _merge_bucket(columns[column], bucket)
+        return [(b[0], b[2], b[3], b[4] / b[1]) for b in columns if b is not None]
+
+
+# 趋势图面板：在Tk Canvas上绘制多条降采样的时间序列和阶段色带
+class TimeSeriesChart:
+    WINDOWS = {"全部": None, "最近1000循环": 1000, "最近10000循环": 10000}  # 可选的显示范围
+    MARGIN = 40  # 左侧坐标轴留白
+    STAGE_STRIP = 10  # 底部阶段色带高度
+
+    def __init__(self, parent, series: Dict[str, Tuple[str, str]], stage_colors: List[str], height: int = 160):
+        """创建趋势图面板
+
+        Args:
+            parent: 父容器
+            series: 序列名称到(线条颜色, 区间填充颜色)的映射
+            stage_colors: 各实验阶段对应的色带颜色
+            height: 画布高度
+        """
+        self.frame = ttk.Frame(parent)  # 面板框架
+        self.series = {name: MultiResolutionSeries() for name in series}  # 各序列的多分辨率聚合
+        self.colors = series  # 各序列的颜色
+        self.stage_series = MultiResolutionSeries()  # 实验阶段序列
+        self.stage_colors = stage_colors  # 阶段色带颜色
+
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill=tk.X)
+        for name, (color, _) in series.items():
+            tk.Label(toolbar, text=f"■ {name}", fg=color).pack(side=tk.LEFT, padx=5)
+        self.window_var = tk.StringVar(value="全部")  # 显示范围
+        window_box = ttk.Combobox(toolbar, textvariable=self.window_var, values=list(self.WINDOWS), state="readonly", width=14)
+        window_box.pack(side=tk.RIGHT, padx=5)
+        window_box.bind("<<ComboboxSelected>>", lambda event: self.redraw())
+        ttk.Label(toolbar, text="显示范围:").pack(side=tk.RIGHT)
+
+        self.canvas = tk.Canvas(self.frame, height=height, background="white", highlightthickness=0)  # 绘图画布
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+
+    def record(self, cycle: int, values: Dict[str, float], stage_index: int) -> None:
+        """记录一个循环的采样（可在实验线程中调用）
+
+        Args:
+            cycle: 循环次数
+            values: 序列名称到采样值的映射
+            stage_index: 实验阶段序号
+        """
+        for name, value in values.items():
+            self.series[name].add(cycle, value)
+        self.stage_series.add(cycle, stage_index)
+
+    def clear(self) -> None:
+        """清空所有序列并重绘"""
+        for series in self.series.values():
+            series.clear()
+        self.stage_series.clear()
+        self.redraw()
+
+    def redraw(self) -> None:
+        """按当前画布宽度重绘趋势图"""
+        self.canvas.delete("all")
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        plot_width = width - self.MARGIN - 5
+        plot_bottom = height - self.STAGE_STRIP - 15
+        if plot_width <= 0 or plot_bottom <= 10:
+            return
+
+        end = self.stage_series.last_cycle
+        if end <= 0:
+            return
+        window = self.WINDOWS.get(self.window_var.get())
+        start = 1 if window is None else max(1, end - window + 1)
+        span = max(end - start, 1)
+
+        views = {name: series.view(start, end, plot_width) for name, series in self.series.items()}
+        top = max((point[2] for points in views.values() for point in points), default=0)
+        top = max(top, 1)
+
+        def to_x(cycle: float) -> float:
+            return self.MARGIN + (cycle - start) / span * plot_width
+
+        def to_y(value: float) -> float:
+            return plot_bottom - value / top * (plot_bottom - 10)
+
+        # 坐标轴和刻度
+        self.canvas.create_line(self.MARGIN, 10, self.MARGIN, plot_bottom, self.MARGIN + plot_width, plot_bottom, fill="gray")
+        self.canvas.create_text(self.MARGIN - 5, 10, text=f"{top:g}", anchor=tk.E)
+        self.canvas.create_text(self.MARGIN - 5, plot_bottom, text="0", anchor=tk.E)
+        self.canvas.create_text(self.MARGIN, height - 2, text=str(start), anchor=tk.SW)
+        self.canvas.create_text(self.MARGIN + plot_width, height - 2, text=str(end), anchor=tk.SE)
+
+        for name, points in views.items():
+            line_color, band_color = self.colors[name]
+            if len(points) < 2:
+                continue
+            # 最小-最大区间填充
+            upper = [coord for p in points for coord in (to_x(p[0]), to_y(p[2]))]
+            lower = [coord for p in reversed(points) for coord in (to_x(p[0]), to_y(p[1]))]
+            self.canvas.create_polygon(upper + lower, fill=band_color, outline="")
+            # 均值折线
+            self.canvas.create_line([coord for p in points for coord in (to_x(p[0]), to_y(p[3]))], fill=line_color)
+
+        # 阶段色带：相邻同色的像素列合并为一个矩形
+        strip_top = plot_bottom + 2
+        run_start = None
+        run_stage = None
+        for point in self.stage_series.view(start, end, plot_width):
+            stage = int(point[2])
+            if stage != run_stage:
+                if run_stage is not None:
+                    self._draw_stage(run_start, to_x(point[0]), strip_top, run_stage)
+                run_start, run_stage = to_x(point[0]), stage
+        if run_stage is not None:
+            self._draw_stage(run_start, self.MARGIN + plot_width, strip_top, run_stage)
+
+    def _draw_stage(self, x0: float, x1: float, top: float, stage: int) -> None:
+        """绘制一段阶段色带"""
+        color = self.stage_colors[min(stage, len(self.stage_colors) - 1)]
+        self.canvas.create_rectangle(x0, top, x1, top + self.STAGE_STRIP, fill=color, outline="")
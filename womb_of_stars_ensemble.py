@@ -0,0 +1,372 @@
+import math
+import multiprocessing
+import os
+import random
+from contextlib import redirect_stdout
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from womb_of_stars import MAX_CYCLES, ExperimentStage, WombOfStars
+
+
+# 单次实验结果：汇总时只需要的少量指标
+class RunResult(NamedTuple):
+    stage_cycles: Dict[ExperimentStage, int]  # 首次进入各阶段时的循环次数
+    eternal_recurrence: int  # 处于永劫轮回阶段的循环数
+    pioneer_cycle: Optional[int]  # 开拓者首次介入时的循环次数
+    breakthrough_cycle: Optional[int]  # 突破永劫轮回时的循环次数
+    golden_blood_fraction: float  # 结束时金血电信号占比
+    black_tide_fraction: float  # 结束时黑潮感染电信号占比
+
+
+def summarize_run(experiment) -> RunResult:
+    """从结束的实验中提取汇总所需的指标
+
+    Args:
+        experiment: WombOfStars或ShardedWombOfStars实例
+
+    Returns:
+        RunResult: 单次实验结果
+    """
+    total = max(experiment.signal_count(), 1)
+    return RunResult(
+        dict(experiment.stage_cycles),
+        experiment.eternal_recurrence_count,
+        experiment.pioneer_cycle,
+        experiment.breakthrough_cycle,
+        experiment.golden_blood_count / total,
+        experiment.black_tide_infected_count / total,
+    )
+
+
+# 在线统计：计数、均值、方差、最小值和最大值（Welford算法，可合并）
+class RunningStats:
+    def __init__(self):
+        self.count = 0  # 样本数
+        self.mean = 0.0  # 均值
+        self.m2 = 0.0  # 离差平方和
+        self.min = math.inf  # 最小值
+        self.max = -math.inf  # 最大值
+
+    def add(self, value: float) -> None:
+        """添加一个样本"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'RunningStats') -> None:
+        """合并另一份在线统计（Chan并行算法）"""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """样本方差"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+# 分位数草图：对数分桶，保证相对误差，桶数有上限，可合并
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy  # 相对误差上限
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)  # 相邻桶边界之比
+        self.max_buckets = max_buckets  # 最大桶数，超出时合并最小的桶
+        self.buckets: Dict[int, int] = {}  # 桶序号到计数的映射
+        self.zero_count = 0  # 非正值的计数
+        self.count = 0  # 样本数
+
+    def add(self, value: float) -> None:
+        """添加一个样本（非正值统一计为0）"""
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value, self.gamma))
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """合并另一份分位数草图（两者的相对误差必须相同）"""
+        if other.gamma != self.gamma:
+            raise ValueError("只能合并相对误差相同的分位数草图")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估计分位数
+
+        Args:
+            q: 分位点，取值范围[0, 1]
+
+        Returns:
+            Optional[float]: 分位数估计值，无样本时返回None
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def _collapse(self) -> None:
+        """将最小的若干桶合并，使桶数回到上限以内（只损失低分位的精度）"""
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.buckets[target] += self.buckets.pop(key)
+
+
+# 固定分箱直方图：分箱相同即可合并
+class Histogram:
+    def __init__(self, low: float, high: float, bins: int):
+        self.low = low  # 下界
+        self.high = high  # 上界
+        self.counts = [0] * bins  # 各分箱计数（超出范围的样本计入两端分箱）
+
+    def add(self, value: float) -> None:
+        """添加一个样本"""
+        index = int((value - self.low) / (self.high - self.low) * len(self.counts))
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+
+    def merge(self, other: 'Histogram') -> None:
+        """合并另一份直方图（分箱必须相同）"""
+        if (other.low, other.high, len(other.counts)) != (self.low, self.high, len(self.counts)):
+            raise ValueError("只能合并分箱相同的直方图")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def edges(self) -> List[float]:
+        """分箱边界"""
+        width = (self.high - self.low) / len(self.counts)
+        return [self.low + i * width for i in range(len(self.counts) + 1)]
+
+
+# 分布摘要：在线统计、分位数草图和可选的直方图
+class Distribution:
+    QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)  # 报告中的分位点
+
+    def __init__(self, histogram: Optional[Tuple[float, float, int]] = None):
+        """创建分布摘要
+
+        Args:
+            histogram: 直方图的(下界, 上界, 分箱数)，为None时不统计直方图
+        """
+        self.stats = RunningStats()  # 在线统计
+        self.sketch = QuantileSketch()  # 分位数草图
+        self.histogram = Histogram(*histogram) if histogram else None  # 直方图
+
+    def add(self, value: float) -> None:
+        """添加一个样本"""
+        self.stats.add(value)
+        self.sketch.add(value)
+        if self.histogram is not None:
+            self.histogram.add(value)
+
+    def merge(self, other: 'Distribution') -> None:
+        """合并另一份分布摘要"""
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        if self.histogram is not None and other.histogram is not None:
+            self.histogram.merge(other.histogram)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估计分位数
+
+        草图的估计值带有相对误差，这里将其限制在已观测的最小值和最大值之间，
+        因此所有样本相同时（例如各阶段的进入循环次数）得到精确值
+
+        Args:
+            q: 分位点，取值范围[0, 1]
+
+        Returns:
+            Optional[float]: 分位数估计值，无样本时返回None
+        """
+        value = self.sketch.quantile(q)
+        if value is None:
+            return None
+        return float(min(max(value, self.stats.min), self.stats.max))
+
+    def report(self) -> Dict:
+        """生成分布报告"""
+        report = {
+            "count": self.stats.count,
+            "mean": self.stats.mean if self.stats.count else None,
+            "stddev": math.sqrt(self.stats.variance) if self.stats.count else None,
+            "min": self.stats.min if self.stats.count else None,
+            "max": self.stats.max if self.stats.count else None,
+            "quantiles": {q: self.quantile(q) for q in self.QUANTILES},
+        }
+        if self.histogram is not None:
+            report["histogram"] = list(zip(self.histogram.edges(), self.histogram.counts))
+        return report
+
+
+# 实验集合摘要：以固定大小的可合并摘要汇总任意多次实验的结果
+class EnsembleSummary:
+    def __init__(self):
+        self.runs = 0  # 实验次数
+        self.stage_cycles = {stage: Distribution() for stage in ExperimentStage if stage != ExperimentStage.INORGANIC}  # 首次进入各阶段的循环次数
+        self.eternal_recurrence = Distribution((0, MAX_CYCLES, 50))  # 处于永劫轮回阶段的循环数
+        self.pioneer_runs = 0  # 开拓者介入的实验次数
+        self.breakthroughs = 0  # 开拓者介入后突破永劫轮回的实验次数
+        self.breakthrough_delay = Distribution()  # 开拓者介入到突破永劫轮回经过的循环数
+        self.golden_blood_fraction = Distribution((0, 1, 20))  # 结束时金血电信号占比
+        self.black_tide_fraction = Distribution((0, 1, 20))  # 结束时黑潮感染电信号占比
+
+    def add(self, result: RunResult) -> None:
+        """汇总一次实验结果"""
+        self.runs += 1
+        for stage, cycle in result.stage_cycles.items():
+            if stage in self.stage_cycles:
+                self.stage_cycles[stage].add(cycle)
+        self.eternal_recurrence.add(result.eternal_recurrence)
+        if result.pioneer_cycle is not None:
+            self.pioneer_runs += 1
+            if result.breakthrough_cycle is not None:
+                self.breakthroughs += 1
+                self.breakthrough_delay.add(result.breakthrough_cycle - result.pioneer_cycle)
+        self.golden_blood_fraction.add(result.golden_blood_fraction)
+        self.black_tide_fraction.add(result.black_tide_fraction)
+
+    def merge(self, other: 'EnsembleSummary') -> 'EnsembleSummary':
+        """合并另一份实验集合摘要
+
+        Returns:
+            EnsembleSummary: 合并后的自身，便于链式归约
+        """
+        self.runs += other.runs
+        for stage, distribution in self.stage_cycles.items():
+            distribution.merge(other.stage_cycles[stage])
+        self.eternal_recurrence.merge(other.eternal_recurrence)
+        self.pioneer_runs += other.pioneer_runs
+        self.breakthroughs += other.breakthroughs
+        self.breakthrough_delay.merge(other.breakthrough_delay)
+        self.golden_blood_fraction.merge(other.golden_blood_fraction)
+        self.black_tide_fraction.merge(other.black_tide_fraction)
+        return self
+
+    def report(self) -> Dict:
+        """生成汇总报告"""
+        return {
+            "runs": self.runs,
+            "stage_cycles": {stage.name: distribution.report() for stage, distribution in self.stage_cycles.items()},
+            "eternal_recurrence": self.eternal_recurrence.report(),
+            "pioneer_runs": self.pioneer_runs,
+            "breakthrough_rate": self.breakthroughs / self.pioneer_runs if self.pioneer_runs else None,
+            "breakthrough_delay": self.breakthrough_delay.report(),
+            "golden_blood_fraction": self.golden_blood_fraction.report(),
+            "black_tide_fraction": self.black_tide_fraction.report(),
+        }
+
+    def print_report(self) -> None:
+        """打印汇总报告"""
+        print("\n=== 实验集合汇总 ===")
+        print(f"实验次数: {self.runs}")
+        for stage, distribution in self.stage_cycles.items():
+            stats = distribution.stats
+            if stats.count:
+                print(f"进入{stage.value}阶段: {stats.count}次，平均循环 {stats.mean:.1f}，中位数 {distribution.quantile(0.5):.1f}")
+        print(f"永劫轮回循环数: 平均 {self.eternal_recurrence.stats.mean:.1f}，中位数 {self.eternal_recurrence.quantile(0.5) or 0:.1f}")
+        if self.pioneer_runs:
+            print(f"开拓者介入后突破率: {self.breakthroughs / self.pioneer_runs:.2%}（{self.breakthroughs}/{self.pioneer_runs}）")
+        print(f"金血电信号占比: 平均 {self.golden_blood_fraction.stats.mean:.3f}")
+        print(f"黑潮感染电信号占比: 平均 {self.black_tide_fraction.stats.mean:.3f}")
+
+
+def merge_all(summaries: Iterable[EnsembleSummary]) -> EnsembleSummary:
+    """按二叉树分层合并多份实验集合摘要
+
+    摘要按到达顺序流式合并：只有覆盖相同数量摘要的两棵子树才会合并，
+    因此每份摘要只参与对数次合并，同时最多保留对数份未合并的摘要
+
+    Args:
+        summaries: 待合并的摘要（可以是工作进程结果的迭代器）
+
+    Returns:
+        EnsembleSummary: 合并结果
+    """
+    pending: List[Tuple[int, EnsembleSummary]] = []  # (子树包含的摘要数量, 子树的合并结果)
+    for summary in summaries:
+        size = 1
+        while pending and pending[-1][0] == size:
+            summary = pending.pop()[1].merge(summary)
+            size *= 2
+        pending.append((size, summary))
+    result = EnsembleSummary()
+    while pending:
+        result = pending.pop()[1].merge(result)
+    return result
+
+
+def _run_chunk(args: Tuple[int, int, int, Optional[int]]) -> EnsembleSummary:
+    """在工作进程中运行一批实验，并就地汇总为一份摘要
+
+    Args:
+        args: (起始序号, 实验次数, 随机数种子基数, 开拓者介入的循环次数)
+
+    Returns:
+        EnsembleSummary: 这一批实验的摘要
+    """
+    start, count, seed, pioneer_at = args
+    summary = EnsembleSummary()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for index in range(start, start + count):
+            random.seed(seed + index)
+            experiment = WombOfStars()
+            try:
+                experiment.initialize()
+                while True:
+                    if experiment.cycles == pioneer_at:
+                        experiment.introduce_pioneer()
+                    if not experiment.run_cycle():
+                        break
+                summary.add(summarize_run(experiment))
+            finally:
+                experiment.close()
+    return summary
+
+
+def run_ensemble(runs: int, workers: Optional[int] = None, chunk_size: int = 100, seed: int = 0,
+                 pioneer_at: Optional[int] = 5) -> EnsembleSummary:
+    """并行运行大量实验并汇总结果
+
+    每个工作进程把一批实验就地汇总为固定大小的摘要，主进程用merge_all分层合并摘要，
+    因此内存占用与实验次数无关
+
+    Args:
+        runs: 实验次数
+        workers: 工作进程数量，默认为CPU核心数
+        chunk_size: 每批实验的次数
+        seed: 随机数种子基数，第i次实验使用seed + i
+        pioneer_at: 在该循环次数时引入开拓者，为None时不引入
+
+    Returns:
+        EnsembleSummary: 全部实验的摘要
+    """
+    tasks = ((start, min(chunk_size, runs - start), seed, pioneer_at) for start in range(0, runs, chunk_size))
+    with multiprocessing.get_context().Pool(workers) as pool:
+        return merge_all(pool.imap_unordered(_run_chunk, tasks))
+
+
+# 运行实验集合
+if __name__ == "__main__":
+    run_ensemble(200).print_report()
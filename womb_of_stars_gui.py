@@ -3,6 +3,7 @@ from tkinter import ttk, scrolledtext
 import threading
 import time
 from womb_of_stars import WombOfStars, ExperimentStage
+from womb_of_stars_chart import TimeSeriesChart
 import sys
 from io import StringIO
 
@@ -11,7 +12,7 @@ class WombOfStarsGUI:
     def __init__(self, root):
         self.root = root  # 主窗口
         self.root.title("翁法罗斯实验模拟")  # 窗口标题
-        self.root.geometry("1100x700")  # 窗口初始大小
+        self.root.geometry("1100x880")  # 窗口初始大小
         self.root.resizable(True, True)  # 允许调整窗口大小
 
         # 创建实验实例
@@ -20,6 +21,11 @@ class WombOfStarsGUI:
         self.paused = False  # 实验暂停状态
         self.log_buffer = StringIO()  # 日志缓冲区
         self.original_stdout = sys.stdout  # 保存原始标准输出
+        self.experiment_thread = None  # 实验线程
+        self.active_experiments = set()  # 仍被实验线程使用的实验实例
+        self.experiment_lock = threading.Lock()  # 保护实验实例的替换与关闭
+        self.stop_event = threading.Event()  # 停止信号，用于打断实验线程的等待
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)  # 关闭窗口时释放实验资源
 
         # 创建主框架
         self.main_frame = ttk.Frame(self.root, padding=10)  # 主框架
@@ -95,6 +101,18 @@ class WombOfStarsGUI:
                 col = 0
                 row += 1
 
+        # 创建趋势图区域
+        self.chart_frame = ttk.LabelFrame(self.main_frame, text="趋势图", padding=10)  # 趋势图区域框架
+        self.chart_frame.pack(fill=tk.X, pady=(0, 10))  # 水平填充，上下边距
+        self.chart = TimeSeriesChart(self.chart_frame, {
+            "金血电信号": ("#b8860b", "#f5e6b8"),
+            "黑潮感染": ("#2f2f4f", "#d0d0e0"),
+            "合并电信号": ("#2e8b57", "#cde8d8")
+        }, ["#c8c8c8", "#9fd39f", "#9fc3e8", "#e8c39f", "#d89fd8"])  # 趋势图面板（阶段色带依次对应五个实验阶段）
+        self.chart.frame.pack(fill=tk.BOTH, expand=True)  # 填充整个区域
+        self.chart_drawn_at = 0.0  # 上次重绘趋势图的时间
+        self.chart_redraw_pending = None  # 已安排的延迟重绘任务
+
         # 创建底部区域，分为左右两部分
         self.bottom_frame = ttk.Frame(self.main_frame)  # 底部框架
         self.bottom_frame.pack(fill=tk.BOTH, expand=True)  # 填充整个区域
@@ -181,6 +199,8 @@ class WombOfStarsGUI:
             self.start_button.config(state=tk.DISABLED)  # 禁用开始按钮
             self.pause_button.config(state=tk.NORMAL)    # 启用暂停按钮
             self.pioneer_button.config(state=tk.NORMAL)  # 启用引入开拓者按钮
+            self.active_experiments.add(self.experiment)
+            self.stop_event.clear()
             self.experiment_thread = threading.Thread(target=self.run_experiment)  # 创建实验线程
             self.experiment_thread.daemon = True  # 设置为守护线程
             self.experiment_thread.start()  # 启动线程
@@ -206,17 +226,44 @@ class WombOfStarsGUI:
         """
         self.running = False
         self.paused = False
-        self.experiment = WombOfStars()  # 创建新的实验实例
+        self.replace_experiment(WombOfStars())  # 创建新的实验实例并释放旧实例
         self.log_buffer = StringIO()  # 重置日志缓冲区
         self.update_status()  # 更新状态显示
         self.update_signals_list()  # 更新电信号列表
         self.log_text.config(state=tk.NORMAL)  # 启用日志文本框
         self.log_text.delete(1.0, tk.END)  # 清空日志
         self.log_text.config(state=tk.DISABLED)  # 禁用日志文本框
+        self.chart.clear()  # 清空趋势图
         self.start_button.config(state=tk.NORMAL)  # 启用开始按钮
         self.pause_button.config(state=tk.DISABLED)  # 禁用暂停按钮
         self.pioneer_button.config(state=tk.DISABLED)  # 禁用引入开拓者按钮
 
+    def replace_experiment(self, experiment):
+        """替换当前实验实例并释放旧实例的资源
+
+        实验线程仍在运行时由实验线程在退出时关闭旧实例，
+        避免在实验循环进行中关闭记忆段文件
+
+        Args:
+            experiment: 新的实验实例，为None时仅释放旧实例
+        """
+        self.stop_event.set()
+        with self.experiment_lock:
+            old_experiment = self.experiment
+            self.experiment = experiment
+            if old_experiment not in self.active_experiments:
+                old_experiment.close()
+
+    def on_close(self):
+        """关闭窗口
+
+        停止实验并释放实验资源后销毁主窗口
+        """
+        self.running = False
+        self.paused = False
+        self.replace_experiment(None)
+        self.root.destroy()
+
     def introduce_pioneer(self):
         """引入开拓者
 
@@ -236,9 +283,26 @@ class WombOfStarsGUI:
         """
         # 重定向标准输出到日志缓冲区
         sys.stdout = self.log_buffer
+        experiment = self.experiment  # 本线程使用的实验实例
+        try:
+            self._run_experiment_loop(experiment)
+        finally:
+            # 恢复标准输出
+            sys.stdout = sys.__stdout__
+            # 实验实例在运行期间被替换时，由本线程负责关闭
+            with self.experiment_lock:
+                self.active_experiments.discard(experiment)
+                if self.experiment is not experiment:
+                    experiment.close()
+
+    def _run_experiment_loop(self, experiment):
+        """执行实验循环直到达到循环次数或实验被停止
 
+        Args:
+            experiment: 本线程使用的实验实例
+        """
         # 初始化实验
-        self.experiment.initialize()
+        experiment.initialize()
         self.root.after(0, self.update_gui)  # 触发GUI更新
 
         # 运行实验循环
@@ -256,15 +320,20 @@ class WombOfStarsGUI:
                 time.sleep(0.1)
                 if not self.running:
                     break
+            if not self.running or self.experiment is not experiment:
+                break
             # 执行实验循环
-            self.experiment.run_cycle()
+            experiment.run_cycle()
+            # 在锁内确认实验实例未被替换后再记录采样，
+            # 重置时先在锁内替换实例再清空趋势图，因此旧实验的采样不会混入新实验的趋势图
+            with self.experiment_lock:
+                if not self.running or self.experiment is not experiment:
+                    break
+                self.record_chart(experiment)
             # 更新GUI
             self.root.after(0, self.update_gui)
-            # 根据速度控制等待时间
-            time.sleep(1.0 / max(0.1, self.speed_var.get()))
-
-        # 恢复标准输出
-        sys.stdout = sys.__stdout__
+            # 根据速度控制等待时间（停止时立即结束等待）
+            self.stop_event.wait(1.0 / max(0.1, self.speed_var.get()))
 
     def update_gui(self):
         """更新GUI元素
@@ -357,6 +426,43 @@ class WombOfStarsGUI:
         self.update_signals_list()
         # 更新日志
         self.update_log()
+        # 更新趋势图
+        self.update_chart()
+
+    def record_chart(self, experiment):
+        """记录当前循环的趋势图采样
+
+        在实验线程中调用，每个循环采样一次
+
+        Args:
+            experiment: 实验线程使用的实验实例
+        """
+        self.chart.record(experiment.cycles, {
+            "金血电信号": experiment.golden_blood_count,
+            "黑潮感染": experiment.black_tide_infected_count,
+            "合并电信号": sum(1 for s in experiment.signals if s.is_merged)
+        }, list(ExperimentStage).index(experiment.stage))
+
+    def update_chart(self):
+        """重绘趋势图
+
+        重绘开销与画布宽度有关而与运行时长无关，并限制为每0.2秒最多一次；
+        限流期间的更新会合并为一次延迟重绘，保证最后一次采样总会显示出来
+        """
+        if self.chart_redraw_pending is not None:
+            # 已安排延迟重绘，届时会绘制最新的采样
+            return
+        remaining = 0.2 - (time.monotonic() - self.chart_drawn_at)
+        if remaining <= 0:
+            self.redraw_chart()
+        else:
+            self.chart_redraw_pending = self.root.after(int(remaining * 1000) + 1, self.redraw_chart)
+
+    def redraw_chart(self):
+        """立即重绘趋势图并记录重绘时间"""
+        self.chart_redraw_pending = None
+        self.chart_drawn_at = time.monotonic()
+        self.chart.redraw()
 
     def update_status(self):
         self.status_vars["阶段"].set(self.experiment.stage.value)
@@ -406,6 +512,9 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = WombOfStarsGUI(root)
     root.mainloop()
+    # 等待实验线程退出并释放其实验实例
+    if app.experiment_thread is not None:
+        app.experiment_thread.join(timeout=5.0)
 
 
 # 使用说明:
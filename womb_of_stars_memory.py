@@ -0,0 +1,314 @@
+import json
+import mmap
+import os
+import tempfile
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# 记忆条目：(循环次数, 决策描述)
+MemoryEntry = Tuple[int, str]
+
+
+# 记忆块：已压缩并溢出到段文件中的一段连续记忆
+class MemoryBlock(NamedTuple):
+    offset: int  # 段文件中的起始偏移
+    length: int  # 压缩后的字节长度
+    count: int  # 条目数量
+    first_cycle: int  # 块内最小循环次数
+    last_cycle: int  # 块内最大循环次数
+
+
+# 导出的记忆：(已溢出记忆块的(段文件路径, 块索引)列表, 内存中的近期记忆)
+ExportedMemory = Tuple[List[Tuple[str, MemoryBlock]], List[MemoryEntry]]
+
+
+# 记忆段文件：只追加写入，通过内存映射读取
+class MemorySegment:
+    REMAP_BYTES = 1 << 20  # 文件增长超过该字节数后才重新映射
+
+    def __init__(self, path: Optional[str] = None, readonly: bool = False):
+        """打开记忆段文件
+
+        Args:
+            path: 段文件路径，为None时使用匿名临时文件
+            readonly: 是否以只读方式打开已有的段文件（例如其他进程写入的段文件）
+        """
+        self.path = path  # 段文件路径
+        if path is None:
+            self._file = tempfile.TemporaryFile()
+        else:
+            self._file = open(path, "rb" if readonly else "w+b")
+        self._size = 0  # 本段已写入的字节数
+        self._dirty = False  # 是否有尚未刷新到文件的写入
+        self._map: Optional[mmap.mmap] = None  # 只读内存映射
+        # 整个段共用一个原始deflate压缩流，每个块结束时完全刷新并重置字典，
+        # 因此每个块都可以单独解压，同时避免为每个小块重新初始化压缩器
+        self._compressor = zlib.compressobj(wbits=-15)
+
+    def append(self, entries: List[MemoryEntry]) -> MemoryBlock:
+        """压缩一组记忆条目并追加到段文件末尾
+
+        Args:
+            entries: 待溢出的记忆条目，不能为空
+
+        Returns:
+            MemoryBlock: 新写入的记忆块索引
+        """
+        return self._write(
+            json.dumps(entries, ensure_ascii=False).encode("utf-8"),
+            len(entries),
+            min(cycle for cycle, _ in entries),
+            max(cycle for cycle, _ in entries),
+        )
+
+    def merge(self, blocks: List[MemoryBlock]) -> MemoryBlock:
+        """将本段中的若干记忆块按顺序合并为一个新块
+
+        直接拼接解压后的JSON数组，不需要解析和重新编码记忆条目
+
+        Args:
+            blocks: 待合并的记忆块，必须都属于本段
+
+        Returns:
+            MemoryBlock: 合并后的记忆块索引
+        """
+        arrays = [self._read_raw(block) for block in blocks]
+        return self._write(
+            b"[" + b",".join(array[1:-1] for array in arrays) + b"]",
+            sum(block.count for block in blocks),
+            min(block.first_cycle for block in blocks),
+            max(block.last_cycle for block in blocks),
+        )
+
+    def _write(self, data: bytes, count: int, first_cycle: int, last_cycle: int) -> MemoryBlock:
+        """压缩编码后的记忆条目并追加到段文件末尾"""
+        payload = self._compressor.compress(data) + self._compressor.flush(zlib.Z_FULL_FLUSH)
+        self._file.seek(self._size)
+        self._file.write(payload)
+        self._dirty = True
+        block = MemoryBlock(self._size, len(payload), count, first_cycle, last_cycle)
+        self._size += len(payload)
+        return block
+
+    def read(self, block: MemoryBlock) -> List[MemoryEntry]:
+        """读取并解压一个记忆块
+
+        Args:
+            block: 记忆块索引
+
+        Returns:
+            List[MemoryEntry]: 块内的全部记忆条目
+        """
+        return [tuple(entry) for entry in json.loads(self._read_raw(block))]
+
+    def _read_raw(self, block: MemoryBlock) -> bytes:
+        """读取并解压一个记忆块，返回编码后的JSON数组"""
+        end = block.offset + block.length
+        if self._map is None or len(self._map) < end:
+            self.flush()
+            size = os.fstat(self._file.fileno()).st_size
+            if self._map is not None and size - len(self._map) < self.REMAP_BYTES:
+                # 刚写入的小块直接读取，避免每次追加后都重新映射
+                data = os.pread(self._file.fileno(), block.length, block.offset)
+                return zlib.decompressobj(wbits=-15).decompress(data)
+            # 段文件增长较多后重新映射（只读段文件可能由其他进程继续追加）
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return zlib.decompressobj(wbits=-15).decompress(self._map[block.offset:end])
+
+    def flush(self) -> None:
+        """将缓冲的写入刷新到文件，使内存映射和其他进程可以读取"""
+        if self._dirty:
+            self._file.flush()
+            self._dirty = False
+
+    def close(self) -> None:
+        """关闭内存映射和段文件"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+# 分层记忆存储：近期记忆保留在内存中，较早的记忆溢出到段文件
+class MemoryStore:
+    def __init__(self, per_signal_limit: int = 1000, global_limit: int = 20000, path: Optional[str] = None,
+                 block_entries: int = 4096):
+        self.per_signal_limit = per_signal_limit  # 单个电信号在内存中保留的最大条目数
+        self.global_limit = global_limit  # 所有电信号在内存中保留的最大条目总数
+        self.block_entries = block_entries  # 合并相邻小记忆块时单个记忆块的最大条目数
+        self.segment = MemorySegment(path)  # 记忆段文件
+        self.ram_entries = 0  # 当前内存中的条目总数
+        self._foreign: Dict[str, MemorySegment] = {}  # 以只读方式打开的其他段文件
+        self._resident: Dict['SignalMemory', None] = {}  # 内存中有近期记忆的电信号记忆，按最早写入顺序排列
+
+    def segment_at(self, path: str) -> MemorySegment:
+        """获取指定路径的段文件（本存储自身的段文件或以只读方式打开的其他段文件）"""
+        if path == self.segment.path:
+            return self.segment
+        if path not in self._foreign:
+            self._foreign[path] = MemorySegment(path, readonly=True)
+        return self._foreign[path]
+
+    def enforce_budget(self, memory: 'SignalMemory') -> None:
+        """在记忆写入后检查内存预算，必要时溢出较早的记忆
+
+        Args:
+            memory: 刚写入记忆的电信号记忆
+        """
+        if memory not in self._resident:
+            self._resident[memory] = None
+        if len(memory.recent) > self.per_signal_limit:
+            # 单个电信号超出预算：溢出较早的一半，保留最近的记忆
+            memory.spill(len(memory.recent) - self.per_signal_limit // 2)
+        while self.ram_entries > self.global_limit:
+            # 全局超出预算：整体溢出近期记忆最早写入的电信号记忆，溢出的小块随后由_compact分层合并
+            next(iter(self._resident)).spill_all()
+
+    def release(self, memory: 'SignalMemory') -> None:
+        """记忆的近期部分被全部溢出后，将其移出常驻列表"""
+        self._resident.pop(memory, None)
+
+    def close(self) -> None:
+        """关闭所有段文件"""
+        for segment in self._foreign.values():
+            segment.close()
+        self._foreign.clear()
+        self.segment.close()
+
+
+# 电信号记忆：按循环次数索引的分层记忆
+class SignalMemory:
+    COMPACT_FANOUT = 8  # 一次合并的末尾小记忆块数量
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self.store = store  # 分层记忆存储（为None时全部保留在内存中）
+        self.blocks: List[Tuple[MemorySegment, MemoryBlock]] = []  # 已溢出的记忆块索引
+        self.recent: List[MemoryEntry] = []  # 内存中的近期记忆
+
+    def __len__(self) -> int:
+        return sum(block.count for _, block in self.blocks) + len(self.recent)
+
+    def __iter__(self) -> Iterator[MemoryEntry]:
+        """按写入顺序遍历全部记忆（会读取所有已溢出的记忆块）"""
+        for segment, block in self.blocks:
+            yield from segment.read(block)
+        yield from self.recent
+
+    def record(self, cycle: int, action: str) -> None:
+        """记录一条记忆
+
+        Args:
+            cycle: 当前循环次数
+            action: 决策描述
+        """
+        self.recent.append((cycle, action))
+        if self.store is not None:
+            self.store.ram_entries += 1
+            self.store.enforce_budget(self)
+
+    def extend(self, other: 'SignalMemory') -> None:
+        """继承另一份记忆
+
+        已溢出的记忆块是不可变的，直接共享块索引而不复制数据
+
+        Args:
+            other: 被继承的记忆
+        """
+        if other.blocks and other.store is not self.store:
+            # 来自其他存储的记忆块无法共享，只能逐条复制
+            self._append_recent(list(other))
+            return
+        self.blocks.extend(other.blocks)
+        self._append_recent(list(other.recent))
+
+    def export(self) -> ExportedMemory:
+        """导出记忆，用于跨进程继承
+
+        记忆块以段文件路径表示，要求存储使用指定路径的段文件
+
+        Returns:
+            ExportedMemory: 可序列化的记忆块索引和近期记忆
+        """
+        if self.store is not None:
+            self.store.segment.flush()
+        return [(segment.path, block) for segment, block in self.blocks], list(self.recent)
+
+    def adopt(self, exported: ExportedMemory) -> None:
+        """继承由export导出的记忆
+
+        Args:
+            exported: 其他记忆导出的记忆块索引和近期记忆
+        """
+        blocks, recent = exported
+        self.blocks.extend((self.store.segment_at(path), MemoryBlock(*block)) for path, block in blocks)
+        self._append_recent(list(recent))
+
+    def query(self, start_cycle: int, end_cycle: int) -> List[MemoryEntry]:
+        """查询指定循环区间内的记忆
+
+        只读取与区间重叠的记忆块
+
+        Args:
+            start_cycle: 起始循环次数（包含）
+            end_cycle: 结束循环次数（包含）
+
+        Returns:
+            List[MemoryEntry]: 区间内的记忆条目，按循环次数排序
+        """
+        result = []
+        for segment, block in self.blocks:
+            if block.last_cycle < start_cycle or block.first_cycle > end_cycle:
+                continue
+            result.extend(entry for entry in segment.read(block) if start_cycle <= entry[0] <= end_cycle)
+        result.extend(entry for entry in self.recent if start_cycle <= entry[0] <= end_cycle)
+        result.sort(key=lambda entry: entry[0])
+        return result
+
+    def spill(self, count: int) -> None:
+        """将最早的若干条近期记忆压缩溢出到段文件
+
+        Args:
+            count: 溢出的条目数量
+        """
+        count = min(count, len(self.recent))
+        if self.store is None or count <= 0:
+            return
+        self.blocks.append((self.store.segment, self.store.segment.append(self.recent[:count])))
+        del self.recent[:count]
+        self.store.ram_entries -= count
+        if not self.recent:
+            self.store.release(self)
+        self._compact()
+
+    def _compact(self) -> None:
+        """分层合并末尾的小记忆块
+
+        末尾连续COMPACT_FANOUT个记忆块大小相近（最大不超过最小的两倍）且总数不超过block_entries时合并为一块，
+        合并后的块又会与后续同等大小的块继续合并，因此每条记忆只会被重写对数次，
+        每份记忆的块数约为条目数/block_entries加上每层不到COMPACT_FANOUT个末尾小块。
+        被合并的旧块仍留在只追加的段文件中，但不再被索引
+        """
+        segment = self.store.segment
+        while len(self.blocks) >= self.COMPACT_FANOUT:
+            tail = self.blocks[-self.COMPACT_FANOUT:]
+            if any(block_segment is not segment for block_segment, _ in tail):
+                return
+            counts = [block.count for _, block in tail]
+            if max(counts) > 2 * min(counts) or sum(counts) > self.store.block_entries:
+                return
+            self.blocks[-self.COMPACT_FANOUT:] = [(segment, segment.merge([block for _, block in tail]))]
+
+    def spill_all(self) -> None:
+        """将全部近期记忆溢出到段文件"""
+        self.spill(len(self.recent))
+
+    def _append_recent(self, entries: List[MemoryEntry]) -> None:
+        """追加近期记忆并检查内存预算"""
+        if not entries:
+            return
+        self.recent.extend(entries)
+        if self.store is not None:
+            self.store.ram_entries += len(entries)
+            self.store.enforce_budget(self)
@@ -0,0 +1,461 @@
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import tempfile
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from womb_of_stars import (BREAKTHROUGH_PROBABILITY, DECISION_TEMPLATES, DEFAULT_DECISION_TEMPLATE, INITIAL_SIGNALS,
+                           REGENESIS_LOCKED_SIGNALS, STAGE_MESSAGES, ExperimentStage, Motivation, Path,
+                           experiment_finished, next_stage)
+from womb_of_stars_memory import MemoryEntry, MemoryStore, SignalMemory
+
+PATHS = list(Path)  # 路径列中的编码顺序
+MOTIVATIONS = list(Motivation)  # 原动力列中的编码顺序
+
+# 标志列中的状态位
+LOCKED = 1  # 被锁定
+MERGED = 2  # 已合并
+GOLDEN_BLOOD = 4  # 金血特征
+BLACK_TIDE = 8  # 黑潮感染
+
+
+def _signal_id(index: int, names: Dict[int, str]) -> str:
+    """获取电信号ID：具名电信号使用其名称，其余按序号生成"""
+    return names.get(index) or f"Signal{index}"
+
+
+def _shard_worker(shard: int, lo: int, hi: int, names: Dict[int, str], column_names: Tuple[str, str, str, str],
+                  commands, results, seed: int, memory_args: Tuple[int, int, str]) -> None:
+    """分片工作进程：负责[lo, hi)区间内电信号的决策、记忆和变异
+
+    Args:
+        shard: 分片序号
+        lo: 分片起始下标
+        hi: 分片结束下标（不包含）
+        names: 具名电信号的下标到ID的映射
+        column_names: 路径列、原动力列、标志列和统计列的共享内存名称
+        commands: 接收协调者命令的队列
+        results: 向协调者返回结果和阶段完成通知的队列
+        seed: 随机数种子
+        memory_args: 记忆存储的(单电信号预算, 全局预算, 段文件路径)
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name in column_names]
+    paths, motivations, flags = (block.buf for block in blocks[:3])
+    stats = blocks[3].buf.cast("q")
+    rng = random.Random(seed)
+    store = MemoryStore(*memory_args)
+    memories: Dict[int, SignalMemory] = {}  # 下标到电信号记忆的映射，首次写入时创建
+    size = hi
+
+    def memory(index: int) -> SignalMemory:
+        if index not in memories:
+            memories[index] = SignalMemory(store)
+        return memories[index]
+
+    # 金血和黑潮只会从无到有，增量统计即可
+    golden_blood = sum(1 for i in range(lo, hi) if flags[i] & GOLDEN_BLOOD)
+    black_tide = sum(1 for i in range(lo, hi) if flags[i] & BLACK_TIDE)
+
+    parent = multiprocessing.parent_process()  # 协调者进程，退出后工作进程随之退出
+    try:
+        while True:
+            try:
+                command = commands.get(timeout=1.0)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    break
+                continue
+            kind = command[0]
+            if kind == "act":
+                # 电信号行动：未合并的电信号做出决策并记录记忆
+                _, cycles, size = command
+                for i in range(lo, min(hi, size)):
+                    if not flags[i] & MERGED:
+                        template = DECISION_TEMPLATES.get(MOTIVATIONS[motivations[i]], DEFAULT_DECISION_TEMPLATE)
+                        memory(i).record(cycles, template.format(_signal_id(i, names)))
+                results.put(shard)
+            elif kind == "mutate":
+                # 电信号变异：与ElectricalSignal.mutate相同的概率
+                for i in range(lo, min(hi, size)):
+                    state = flags[i]
+                    if state & (MERGED | LOCKED):
+                        continue
+                    if rng.random() < 0.1:
+                        paths[i] = rng.randrange(len(PATHS))
+                    elif rng.random() < 0.2:
+                        if not state & GOLDEN_BLOOD:
+                            flags[i] = state | GOLDEN_BLOOD
+                            golden_blood += 1
+                    elif rng.random() < 0.3:
+                        if not state & BLACK_TIDE:
+                            flags[i] = state | BLACK_TIDE
+                            black_tide += 1
+                stats[shard * 2] = golden_blood
+                stats[shard * 2 + 1] = black_tide
+                results.put(shard)
+            elif kind == "export":
+                results.put(memory(command[1]).export())
+            elif kind == "inherit":
+                memory(command[1]).adopt(command[2])
+            elif kind == "query":
+                _, index, start_cycle, end_cycle = command
+                results.put(memory(index).query(start_cycle, end_cycle))
+            elif kind == "name":
+                names[command[1]] = command[2]
+            elif kind == "stop":
+                break
+    finally:
+        del paths, motivations, flags, stats
+        store.close()
+        for block in blocks:
+            block.close()
+
+
+# 分片翁法罗斯实验：将一个大规模电信号群体按列存放在共享内存中，由多个工作进程并行处理
+class ShardedWombOfStars:
+    def __init__(self, population: int, workers: Optional[int] = None, seed: Optional[int] = None,
+                 interactions_per_cycle: int = 1, pioneer_slots: int = 8,
+                 memory_per_signal: int = 1000, memory_global: int = 200000, timeout: Optional[float] = 60.0):
+        """创建分片实验
+
+        Args:
+            population: 初始电信号数量（前几个为具名电信号，其余随机生成）
+            workers: 工作进程数量，默认为CPU核心数
+            seed: 随机数种子
+            interactions_per_cycle: 每个循环尝试的电信号互动次数
+            pioneer_slots: 为开拓者预留的电信号位置数量
+            memory_per_signal: 单个电信号在内存中保留的最大记忆条数
+            memory_global: 每个工作进程在内存中保留的最大记忆条数
+            timeout: 等待工作进程完成一个阶段或返回结果的最长秒数，为None时一直等待
+        """
+        self.stage = ExperimentStage.INORGANIC  # 当前实验阶段
+        self.cycles = 0  # 实验循环次数
+        self.population = max(population, len(INITIAL_SIGNALS))  # 初始电信号数量
+        self.size = 0  # 当前电信号数量
+        self.capacity = self.population + pioneer_slots  # 共享内存列的容量
+        self.workers = workers or os.cpu_count() or 1  # 工作进程数量
+        self.interactions_per_cycle = interactions_per_cycle  # 每个循环尝试的互动次数
+        self.timeout = timeout  # 等待工作进程的超时秒数
+        self.locked_signals: List[int] = []  # 锁定的电信号下标
+        self.merged_count = 0  # 已合并电信号计数
+        self.golden_blood_count = 0  # 金血电信号计数
+        self.black_tide_infected_count = 0  # 黑潮感染电信号计数
+        self.eternal_recurrence_count = 0  # 永劫轮回计数
+        self.pioneer_intervened = False  # 开拓者是否介入
+        self.pioneer_cycle: Optional[int] = None  # 开拓者首次介入时的循环次数
+        self.breakthrough_cycle: Optional[int] = None  # 突破永劫轮回时的循环次数
+        self.stage_cycles: Dict[ExperimentStage, int] = {self.stage: 0}  # 首次进入各阶段时的循环次数
+        self.names: Dict[int, str] = {}  # 具名电信号的下标到ID的映射
+        self.rng = random.Random(seed)  # 协调者随机数生成器
+        self.memory_args = (memory_per_signal, memory_global)  # 工作进程的记忆预算
+        self.memory_dir: Optional[str] = None  # 各分片记忆段文件所在目录
+        self.columns: List[shared_memory.SharedMemory] = []  # 路径、原动力、标志和统计共享内存块
+        self.processes = []  # 工作进程
+        self.commands = []  # 各工作进程的命令队列
+        self.results = None  # 工作进程的结果队列
+        self.bounds: List[Tuple[int, int]] = []  # 各分片的下标区间
+
+    def initialize(self) -> None:
+        """初始化实验
+
+        创建共享内存列，填充初始电信号，并启动工作进程
+        """
+        print("=== 翁法罗斯实验初始化（分片） ===")
+        self.columns = [shared_memory.SharedMemory(create=True, size=self.capacity) for _ in range(3)]
+        self.columns.append(shared_memory.SharedMemory(create=True, size=8 * 2 * self.workers))
+        paths, motivations, flags = (column.buf for column in self.columns[:3])
+        for index, (signal_id, path, motivation) in enumerate(INITIAL_SIGNALS):
+            self.names[index] = signal_id
+            paths[index] = PATHS.index(path)
+            motivations[index] = MOTIVATIONS.index(motivation)
+        count = self.population - len(INITIAL_SIGNALS)
+        paths[len(INITIAL_SIGNALS):self.population] = bytes(self.rng.randrange(len(PATHS)) for _ in range(count))
+        motivations[len(INITIAL_SIGNALS):self.population] = bytes(self.rng.randrange(len(MOTIVATIONS)) for _ in range(count))
+        flags[:self.capacity] = bytes(self.capacity)
+        self.columns[3].buf[:] = bytes(len(self.columns[3].buf))
+        del paths, motivations, flags
+        self.size = self.population
+
+        # 均分电信号，最后一个分片同时负责开拓者预留位置
+        step = -(-self.population // self.workers)
+        self.bounds = [(min(i * step, self.population), min((i + 1) * step, self.population)) for i in range(self.workers)]
+        self.bounds[-1] = (self.bounds[-1][0], self.capacity)
+
+        self.memory_dir = tempfile.mkdtemp(prefix="womb_of_stars_")
+        context = multiprocessing.get_context()
+        self.results = context.Queue()
+        column_names = tuple(column.name for column in self.columns)
+        for shard, (lo, hi) in enumerate(self.bounds):
+            commands = context.Queue()
+            memory_path = os.path.join(self.memory_dir, f"shard{shard}.seg")
+            process = context.Process(
+                target=_shard_worker,
+                args=(shard, lo, hi, dict(self.names), column_names, commands, self.results,
+                      self.rng.getrandbits(64), self.memory_args + (memory_path,)),
+                daemon=True,
+            )
+            process.start()
+            self.commands.append(commands)
+            self.processes.append(process)
+        print(f"初始阶段: {self.stage.value}")
+        print(f"初始电信号数量: {self.size}，工作进程数量: {self.workers}")
+
+    def run_cycle(self) -> bool:
+        """运行一个实验循环
+
+        协调者负责阶段转换和锁定，工作进程并行完成行动和变异，
+        电信号互动（包括跨分片的合并和竞争）在两个阶段之间进行
+
+        Returns:
+            bool: 如果实验应继续运行则返回True，否则返回False
+        """
+        self.cycles += 1
+        print(f"\n=== 循环 {self.cycles} - 阶段: {self.stage.value} ===")
+
+        # 检查是否需要转换阶段
+        self._check_stage_transition()
+
+        # 电信号行动
+        self._broadcast(("act", self.cycles, self.size))
+        self._interact()
+
+        # 电信号变异
+        self._broadcast(("mutate",))
+        stats = self.columns[3].buf.cast("q")
+        self.golden_blood_count = sum(stats[0::2])
+        self.black_tide_infected_count = sum(stats[1::2])
+        stats.release()
+        print(f"金血电信号数量: {self.golden_blood_count}")
+        print(f"黑潮感染电信号数量: {self.black_tide_infected_count}")
+
+        # 检查永劫轮回状态
+        if self.stage == ExperimentStage.ETERNAL_RECURRENCE:
+            self.eternal_recurrence_count += 1
+            print(f"永劫轮回计数: {self.eternal_recurrence_count}")
+            # 检查是否突破永劫轮回
+            if self.pioneer_intervened and self.rng.random() < BREAKTHROUGH_PROBABILITY:
+                print("外部变量介入，突破永劫轮回!")
+                self.stage = ExperimentStage.REGENESIS
+                self.breakthrough_cycle = self.cycles
+                return True
+
+        # 检查实验是否结束
+        if experiment_finished(self.stage, self.cycles, self.eternal_recurrence_count):
+            print("实验结束")
+            return False
+
+        return True
+
+    def _broadcast(self, command: tuple) -> None:
+        """向所有工作进程发送阶段命令并等待它们全部完成"""
+        for commands in self.commands:
+            commands.put(command)
+        self._results(len(self.commands))
+
+    def _results(self, count: int) -> list:
+        """从结果队列获取若干个工作进程的返回结果
+
+        分段等待以便及时发现已退出的工作进程，总等待时间不超过timeout
+
+        Args:
+            count: 需要获取的结果数量
+
+        Returns:
+            list: 按到达顺序排列的结果
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        results = []
+        while len(results) < count:
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            try:
+                results.append(self.results.get(timeout=max(wait, 0.0)))
+            except queue.Empty:
+                self._check_workers()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise RuntimeError(f"工作进程在{self.timeout}秒内未返回结果") from None
+        return results
+
+    def _check_workers(self) -> None:
+        """检查工作进程是否存活，发现已退出的工作进程时抛出异常"""
+        for shard, process in enumerate(self.processes):
+            if not process.is_alive():
+                raise RuntimeError(f"分片 {shard} 的工作进程已意外退出（退出码 {process.exitcode}）")
+
+    def _shard_of(self, index: int) -> int:
+        """获取电信号所在的分片序号"""
+        for shard, (lo, hi) in enumerate(self.bounds):
+            if lo <= index < hi:
+                return shard
+        raise IndexError(index)
+
+    def _check_stage_transition(self) -> None:
+        """检查是否需要转换实验阶段
+
+        阶段转换和锁定只由协调者执行，此时工作进程均处于等待命令状态
+        """
+        flags = self.columns[2].buf
+        stage = next_stage(self.stage, self.cycles, self.rng)
+        if stage is not None:
+            self.stage = stage
+            print(STAGE_MESSAGES[stage])
+        if stage == ExperimentStage.REGENESIS:
+            # 锁定部分电信号
+            for index in self.rng.sample(range(self.size), min(REGENESIS_LOCKED_SIGNALS, self.size)):
+                flags[index] |= LOCKED
+                self.locked_signals.append(index)
+                print(f"电信号 {_signal_id(index, self.names)} 被锁定")
+        elif stage == ExperimentStage.ETERNAL_RECURRENCE:
+            # NeiKos496通常会在永劫轮回中起关键作用
+            neikos = next((index for index, name in self.names.items() if name == "NeiKos496"), None)
+            if neikos is not None:
+                flags[neikos] |= LOCKED
+                self.locked_signals.append(neikos)
+                print(f"电信号 {self.names[neikos]} 在永劫轮回中被锁定")
+        del flags
+
+        # 记录首次进入当前阶段的循环次数
+        self.stage_cycles.setdefault(self.stage, self.cycles)
+
+    def _interact(self) -> None:
+        """处理电信号之间的互动
+
+        合并标志由协调者直接写入共享内存，记忆继承通过败者所在分片导出、
+        胜者所在分片导入完成，因此同分片和跨分片的互动处理方式相同
+        """
+        flags = self.columns[2].buf
+        for _ in range(self.interactions_per_cycle):
+            if self.size <= 1 or self.rng.random() >= 0.3:
+                continue
+            first, second = self.rng.sample(range(self.size), 2)
+            if flags[first] & MERGED or flags[second] & MERGED:
+                continue
+            first_id, second_id = _signal_id(first, self.names), _signal_id(second, self.names)
+            # 随机事件：电信号合并
+            if self.rng.random() < 0.1:
+                print(f"{first_id} 与 {second_id} 合并")
+                flags[second] |= MERGED
+                self.merged_count += 1
+                self._inherit(first, second)
+            # 随机事件：电信号竞争
+            elif self.rng.random() < 0.2:
+                print(f"{first_id} 与 {second_id} 发生竞争")
+                # 胜者获得败者的部分记忆
+                winner, loser = (first, second) if self.rng.random() < 0.5 else (second, first)
+                self._inherit(winner, loser)
+        del flags
+
+    def _inherit(self, winner: int, loser: int) -> None:
+        """让胜者所在分片继承败者的记忆"""
+        self.commands[self._shard_of(loser)].put(("export", loser))
+        exported = self._results(1)[0]
+        self.commands[self._shard_of(winner)].put(("inherit", winner, exported))
+        print(f"{_signal_id(winner, self.names)} 继承了 {_signal_id(loser, self.names)} 的记忆")
+
+    def introduce_pioneer(self) -> None:
+        """引入开拓者变量
+
+        开拓者介入实验，可能会接替空缺的路径，特别是岁月路径
+        这会影响实验进程，增加突破永劫轮回的可能性
+        """
+        print("\n=== 外部变量 '开拓者' 介入 ===")
+        self.pioneer_intervened = True
+        if self.pioneer_cycle is None:
+            self.pioneer_cycle = self.cycles
+        # 开拓者可能会接替空缺的路径
+        paths, flags = self.columns[0].buf, self.columns[2].buf
+        time_path_index = bytes(paths[:self.size]).find(PATHS.index(Path.TIME))
+        if time_path_index >= 0 and flags[time_path_index] & MERGED and self.size < self.capacity:
+            # 在预留位置上创建新的电信号接替岁月路径
+            index = self.size
+            paths[index] = PATHS.index(Path.TIME)
+            self.columns[1].buf[index] = MOTIVATIONS.index(Motivation.PEACE)
+            self.names[index] = "Pioneer"
+            self.commands[self._shard_of(index)].put(("name", index, "Pioneer"))
+            self.size += 1
+            print(f"开拓者接替了岁月路径，创建新电信号 {self.names[index]}")
+        else:
+            print("开拓者介入，影响实验进程")
+        del paths, flags
+
+    def query_memory(self, signal_id: str, start_cycle: int, end_cycle: int) -> List[MemoryEntry]:
+        """查询某个电信号在指定循环区间内的记忆
+
+        Args:
+            signal_id: 电信号ID
+            start_cycle: 起始循环次数（包含）
+            end_cycle: 结束循环次数（包含）
+
+        Returns:
+            List[MemoryEntry]: 区间内的(循环次数, 决策描述)记忆条目
+        """
+        indices = [index for index, name in self.names.items() if name == signal_id]
+        if not indices and signal_id.startswith("Signal") and signal_id[6:].isdigit():
+            indices = [int(signal_id[6:])]
+        result = []
+        for index in indices:
+            if index < self.size:
+                self.commands[self._shard_of(index)].put(("query", index, start_cycle, end_cycle))
+                result.extend(self._results(1)[0])
+        return result
+
+    def signal_count(self) -> int:
+        """当前电信号数量（包括已合并的电信号）"""
+        return self.size
+
+    def close(self) -> None:
+        """停止工作进程并释放共享内存和记忆段文件
+
+        超时仍未退出的工作进程将被强制终止
+        """
+        for commands in self.commands:
+            commands.put(("stop",))
+        for process in self.processes:
+            process.join(self.timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.commands.clear()
+        self.processes.clear()
+        for column in self.columns:
+            column.close()
+            column.unlink()
+        self.columns.clear()
+        if self.memory_dir is not None:
+            shutil.rmtree(self.memory_dir, ignore_errors=True)
+            self.memory_dir = None
+
+    def print_status(self) -> None:
+        """打印当前实验状态"""
+        print("\n=== 实验状态 ===")
+        print(f"阶段: {self.stage.value}")
+        print(f"循环次数: {self.cycles}")
+        print(f"电信号总数: {self.size}")
+        print(f"工作进程数量: {self.workers}")
+        print(f"锁定电信号: {len(self.locked_signals)}")
+        print(f"合并电信号: {self.merged_count}")
+        print(f"金血电信号: {self.golden_blood_count}")
+        print(f"黑潮感染电信号: {self.black_tide_infected_count}")
+        print(f"永劫轮回次数: {self.eternal_recurrence_count}")
+        print(f"开拓者介入: {self.pioneer_intervened}")
+
+
+# 运行分片实验
+if __name__ == "__main__":
+    experiment = ShardedWombOfStars(population=100000)
+    experiment.initialize()
+    try:
+        for _ in range(20):
+            if not experiment.run_cycle():
+                break
+        experiment.introduce_pioneer()
+        for _ in range(20):
+            if not experiment.run_cycle():
+                break
+        experiment.print_status()
+        print(f"\nNeiKos496 最近的记忆: {experiment.query_memory('NeiKos496', experiment.cycles - 2, experiment.cycles)}")
+    finally:
+        experiment.close()